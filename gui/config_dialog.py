@@ -3,9 +3,11 @@
 import sys
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit, 
                                QCheckBox, QSpinBox, QDialogButtonBox,
-                               QGroupBox, QLabel)
+                               QGroupBox, QLabel, QMessageBox)
 from PySide6.QtCore import Qt
 
+from services.serial_worker import parse_heartbeat_pattern
+
 class ConfigDialog(QDialog):
     """
     Ventana de diálogo para la Configuración Avanzada.
@@ -47,6 +49,31 @@ class ConfigDialog(QDialog):
         self.silence_input.setSuffix(" ms")
         self.silence_input.setSingleStep(100) # Incrementar de 100 en 100
 
+        self.liveness_input = QSpinBox()
+        self.liveness_input.setRange(0, 5000) # 0 = desactivado
+        self.liveness_input.setValue(self.config.get("liveness_timeout_ms", 350))
+        self.liveness_input.setSuffix(" ms")
+        self.liveness_input.setSingleStep(50)
+
+        self.heartbeat_input = QLineEdit(self.config.get("heartbeat_pattern", "FE"))
+        self.heartbeat_input.setPlaceholderText("Hex, ej: FE")
+
+        self.sysex_max_input = QSpinBox()
+        self.sysex_max_input.setRange(16, 1048576)
+        self.sysex_max_input.setValue(self.config.get("sysex_max_bytes", 4096))
+        self.sysex_max_input.setSuffix(" bytes")
+
+        self.sysex_chunk_input = QSpinBox()
+        self.sysex_chunk_input.setRange(0, 65536) # 0 = mensaje completo
+        self.sysex_chunk_input.setValue(self.config.get("sysex_chunk_bytes", 0))
+        self.sysex_chunk_input.setSuffix(" bytes")
+
+        self.sysex_timeout_input = QSpinBox()
+        self.sysex_timeout_input.setRange(50, 60000)
+        self.sysex_timeout_input.setValue(self.config.get("sysex_timeout_ms", 1000))
+        self.sysex_timeout_input.setSuffix(" ms")
+        self.sysex_timeout_input.setSingleStep(100)
+
         self.rs_checkbox = QCheckBox("Habilitar Running Status (MIDI)")
         self.rs_checkbox.setChecked(self.config.get("running_status", True))
         
@@ -54,6 +81,11 @@ class ConfigDialog(QDialog):
         form_layout.addRow("Baudrate:", self.baudrate_input)
         form_layout.addRow("Ventana de Envío (Flush):", self.flush_input)
         form_layout.addRow("Tiempo de Reconexión (Silence):", self.silence_input)
+        form_layout.addRow("Timeout de Latido (Liveness):", self.liveness_input)
+        form_layout.addRow("Patrón de Latido:", self.heartbeat_input)
+        form_layout.addRow("Tamaño Máximo SysEx:", self.sysex_max_input)
+        form_layout.addRow("Bloques SysEx (0 = completo):", self.sysex_chunk_input)
+        form_layout.addRow("Timeout SysEx (sin datos):", self.sysex_timeout_input)
         form_layout.addRow("", self.rs_checkbox)
 
         # --- Botones OK/Cancelar ---
@@ -66,6 +98,15 @@ class ConfigDialog(QDialog):
         self.layout.addWidget(form_group)
         self.layout.addWidget(self.button_box)
 
+    def accept(self):
+        """No deja guardar un patrón de latido que no sea hex válido."""
+        if parse_heartbeat_pattern(self.heartbeat_input.text().strip()) is None:
+            QMessageBox.warning(self, "Patrón de Latido inválido",
+                                "El patrón debe ser hex (ej: FE o F0 7D 01 F7), o vacío para desactivarlo.")
+            self.heartbeat_input.setFocus()
+            return
+        super().accept()
+
     def get_config(self):
         """
         Lee los valores de los widgets y los devuelve
@@ -74,6 +115,11 @@ class ConfigDialog(QDialog):
         self.config["baudrate"] = int(self.baudrate_input.text())
         self.config["flush_ms"] = self.flush_input.value()
         self.config["max_silence_s"] = self.silence_input.value() / 1000.0
+        self.config["liveness_timeout_ms"] = self.liveness_input.value()
+        self.config["heartbeat_pattern"] = self.heartbeat_input.text().strip()
+        self.config["sysex_max_bytes"] = self.sysex_max_input.value()
+        self.config["sysex_chunk_bytes"] = self.sysex_chunk_input.value()
+        self.config["sysex_timeout_ms"] = self.sysex_timeout_input.value()
         self.config["running_status"] = self.rs_checkbox.isChecked()
         
         return self.config
\ No newline at end of file
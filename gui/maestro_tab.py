@@ -7,9 +7,16 @@ import serial.tools.list_ports
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                                QPushButton, QComboBox, QGroupBox,
                                QLabel)
-from PySide6.QtCore import QThread, Signal, QObject
+from PySide6.QtCore import QThread, Signal, QObject, QTimer
 
 from services.serial_worker import SerialWorker
+from services.profiling import StageProfiler
+from services.node_state import NodeStateTable
+from services.midi_monitor import EventRing
+from gui.node_table import NodeTableModel, NodeTableView
+from gui.midi_monitor import MidiMonitorWidget
+
+NODE_REFRESH_MS = 250
 
 STATUS_COLORS = {
     "red": "#E57373",
@@ -26,7 +33,6 @@ class MaestroTab(QWidget):
     
     log_signal = Signal(str, str)
     activity_signal = Signal(int)
-    port_released_signal = Signal(str) 
 
     # ¡CAMBIO! Se ha añadido parent_window
     def __init__(self, parent_window, config, assigned_midi_port_name, tab_index):
@@ -38,10 +44,22 @@ class MaestroTab(QWidget):
         
         self.assigned_midi_port_name = assigned_midi_port_name
         self.midi_output_port = None
+        self.standby_com_port = None
         
         self.worker_thread = None
         self.worker = None
 
+        # Perfilado por etapas: persiste entre reconexiones del worker
+        self.profiler = StageProfiler()
+        self.profiler.enabled = getattr(parent_window, "profiling_enabled", False)
+
+        # Estado de nodos: lo escribe el worker, la tabla lo lee por timer
+        self.nodes = NodeStateTable(config.get("max_nodes", 512),
+                                    config.get("node_uplink_key", "channel"))
+
+        # Monitor MIDI: el worker escribe en el ring, la GUI tira a ritmo limitado
+        self.monitor_ring = EventRing(config.get("monitor_buffer", 4096))
+
         self.init_ui()
         self.connect_signals()
         
@@ -81,11 +99,31 @@ class MaestroTab(QWidget):
         conn_layout.addStretch()
         
         main_layout.addLayout(conn_layout)
-        main_layout.addStretch() 
+
+        nodes_group = QGroupBox("Nodos")
+        nodes_layout = QVBoxLayout()
+        nodes_group.setLayout(nodes_layout)
+        self.node_model = NodeTableModel(self.nodes, self)
+        self.node_view = NodeTableView(self.node_model)
+        nodes_layout.addWidget(self.node_view)
+        main_layout.addWidget(nodes_group, stretch=1)
+
+        monitor_group = QGroupBox("Monitor MIDI")
+        monitor_layout = QVBoxLayout()
+        monitor_group.setLayout(monitor_layout)
+        self.midi_monitor = MidiMonitorWidget(self.monitor_ring,
+                                              self.config.get("monitor_refresh_ms", 100))
+        monitor_layout.addWidget(self.midi_monitor)
+        main_layout.addWidget(monitor_group, stretch=1)
+
+        self.node_timer = QTimer(self)
+        self.node_timer.setInterval(NODE_REFRESH_MS)
         
     def connect_signals(self):
         self.btn_refresh_coms.clicked.connect(self.on_refresh_coms)
         self.btn_connect.clicked.connect(self.on_connect_toggle)
+        self.node_timer.timeout.connect(self.node_model.refresh)
+        self.node_timer.start()
 
     # --- ¡NUEVO! Función helper ---
     def get_current_com_port(self):
@@ -118,9 +156,12 @@ class MaestroTab(QWidget):
 
             if self.assigned_midi_port_name and not self.midi_output_port:
                 try:
-                    self.midi_output_port = mido.open_output(self.assigned_midi_port_name)
+                    # Handle persistente y compartido: no se reabre en cada conexión
+                    self.midi_output_port = self.parent_window.midi_pool.acquire(self.assigned_midi_port_name)
+                    clients = self.parent_window.midi_pool.clients(self.assigned_midi_port_name)
                     self.log_signal.emit(
-                        f"Pestaña {self.tab_index}: Puerto MIDI '{self.assigned_midi_port_name}' asignado y abierto.",
+                        f"Pestaña {self.tab_index}: Puerto MIDI '{self.assigned_midi_port_name}' asignado "
+                        f"({clients} pestaña(s) conectadas).",
                         "green"
                     )
                 except Exception as e:
@@ -142,19 +183,32 @@ class MaestroTab(QWidget):
                     self.update_status("Error MIDI", "red")
                     return  # No arrancamos el worker
             
+            # --- Puerto COM de respaldo (failover) ---
+            standby_port = self.config.get("standby_com_ports", {}).get(selected_port)
+            if standby_port and not self.parent_window.request_com_port_lock(standby_port):
+                self.log_signal.emit(
+                    f"Advertencia: el respaldo {standby_port} ya está en uso. {selected_port} queda sin respaldo.",
+                    "orange"
+                )
+                standby_port = None
+            self.standby_com_port = standby_port
+
             thread_config = self.config.copy()
             thread_config["com_port"] = selected_port
+            thread_config["standby_com_port"] = standby_port
             
             self.log_signal.emit(f"Iniciando conexión a {selected_port}...", "blue")
             
             self.worker_thread = QThread()
-            self.worker = SerialWorker(thread_config, self.midi_output_port) 
+            self.worker = SerialWorker(thread_config, self.midi_output_port, self.profiler, self.nodes,
+                                       self.monitor_ring)
             self.worker.moveToThread(self.worker_thread)
             
             self.worker.log_signal.connect(self.log_signal)
             self.worker.status_signal.connect(self.update_status)
             self.worker.activity_signal.connect(self.activity_signal)
             self.worker.com_ports_signal.connect(self.update_com_ports)
+            self.worker.failover_signal.connect(self.on_failover)
             self.worker.finished.connect(self.worker_thread.quit)
             
             self.worker_thread.started.connect(self.worker.run)
@@ -176,17 +230,34 @@ class MaestroTab(QWidget):
             
             if self.midi_output_port:
                 self.log_signal.emit(f"Pestaña {self.tab_index}: Liberando puerto '{self.midi_output_port.name}'.", "gray")
-                self.midi_output_port.close()
+                self.parent_window.midi_pool.release(self.midi_output_port)
                 self.midi_output_port = None
 
             # --- ¡NUEVO! Liberar el puerto COM [Req 2] ---
             self.parent_window.release_com_port(selected_port)
+            self.release_standby_port()
 
             self.btn_connect.setText("Conectar")
             self.update_status("Desconectado", "red")
             self.combo_com_ports.setEnabled(True)
             self.btn_refresh_coms.setEnabled(True)
 
+    def on_failover(self, metrics):
+        """Registra en el log las métricas de una conmutación de puerto."""
+        self.log_signal.emit(
+            f"Pestaña {self.tab_index}: conmutado a {metrics['port']} "
+            f"(detección {metrics['last_detection_ms']:.0f} ms, "
+            f"conmutación {metrics['last_failover_ms']:.0f} ms, "
+            f"total {metrics['failovers']}).",
+            "orange"
+        )
+
+    def release_standby_port(self):
+        """Libera el lock del COM de respaldo, si se había tomado."""
+        if self.standby_com_port:
+            self.parent_window.release_com_port(self.standby_com_port)
+            self.standby_com_port = None
+
     def update_status(self, text, color_name):
         """Actualiza el indicador de estado de ESTA pestaña"""
         self.label_status_text.setText(text)
@@ -210,6 +281,7 @@ class MaestroTab(QWidget):
         # Liberar el puerto COM si estaba conectado
         if self.btn_connect.isChecked():
             self.parent_window.release_com_port(self.get_current_com_port())
+            self.release_standby_port()
         
         if self.worker:
             self.worker.stop()
@@ -218,5 +290,5 @@ class MaestroTab(QWidget):
             self.worker_thread.wait(500)
             
         if self.midi_output_port:
-            self.midi_output_port.close()
-            self.port_released_signal.emit(self.assigned_midi_port_name)
\ No newline at end of file
+            self.parent_window.midi_pool.release(self.midi_output_port)
+            self.midi_output_port = None
\ No newline at end of file
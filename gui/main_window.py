@@ -9,12 +9,15 @@ import serial.tools.list_ports
 from PySide6.QtWidgets import (QMainWindow, QApplication, QWidget, QVBoxLayout, 
                                QTabWidget, QGroupBox, QLabel, QTextEdit, 
                                QStatusBar, QPushButton, QInputDialog, QLineEdit,
-                               QMessageBox)
-from PySide6.QtCore import Signal, Qt, Slot
+                               QMessageBox, QFileDialog)
+from PySide6.QtCore import Signal, Qt, Slot, QTimer
 from PySide6.QtGui import QAction
 
 from gui.maestro_tab import MaestroTab
 from gui.config_dialog import ConfigDialog
+from services.profiling import SamplingProfiler
+from services.midi_output_pool import MidiOutputPool
+from services.rt_tuning import GcPolicy, thread_tuning_from_config
 
 # --- ¡NUEVA FUNCIÓN DE AYUDA! ---
 def resource_path(relative_path):
@@ -64,6 +67,8 @@ class MainWindow(QMainWindow):
     """
     Ventana Principal de la GUI (v1.9 - Empaquetado de Recursos)
     """
+    # Log de los escritores MIDI compartidos (se emite desde sus hilos)
+    pool_log_signal = Signal(str, str)
 
     def __init__(self):
         super().__init__()
@@ -71,11 +76,16 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(700, 500)
 
         self.load_config()
-        self.available_midi_port_names = self.scan_midi_port_names()
+        self.midi_port_names = self.scan_midi_port_names()
+        self.midi_pool = MidiOutputPool(self.config.get("merge_window_ms", 0) / 1000.0,
+                                        thread_tuning_from_config(self.config),
+                                        self.pool_log_signal.emit)
         
         self.maestro_tabs = []
         self.activity_counters = {}
         self.active_com_ports = set()
+        self.profiling_enabled = False
+        self.samplers = []
 
         self.init_ui()
         self.init_menu()
@@ -84,6 +94,10 @@ class MainWindow(QMainWindow):
         self.add_maestro_tab()
         self.add_maestro_tab()
 
+        self.gc_policy = None
+        if self.config.get("rt_tuning", False):
+            self.apply_gc_policy()
+
     def load_config(self):
         """Carga el config.json (persistente)."""
         try:
@@ -99,6 +113,23 @@ class MainWindow(QMainWindow):
                 "flush_ms": 15,
                 "max_silence_s": 60.0,   # coherente con tu config.json actual
                 "running_status": True,
+                "liveness_timeout_ms": 350,
+                "heartbeat_pattern": "FE",
+                "standby_com_ports": {},
+                "sysex_max_bytes": 4096,
+                "sysex_chunk_bytes": 0,
+                "sysex_timeout_ms": 1000,
+                "max_nodes": 512,
+                "node_uplink_key": "channel",
+                "merge_window_ms": 0,
+                "priority_types": ["clock", "start", "continue", "stop", "active_sensing", "reset"],
+                "rt_tuning": False,
+                "rt_cpus": [],
+                "rt_realtime_priority": True,
+                "rt_gc_thresholds": [50000, 50, 100],
+                "rt_gc_idle_ms": 500,
+                "monitor_buffer": 4096,
+                "monitor_refresh_ms": 100,
             }
 
     def scan_midi_port_names(self):
@@ -112,8 +143,8 @@ class MainWindow(QMainWindow):
                 if prefix in real_port:
                     found_ports.append(real_port)
         
-        if len(found_ports) < 2:
-             print(f"¡ADVERTENCIA! Se encontraron menos de 2 puertos MIDI ({len(found_ports)}).")
+        if not found_ports:
+             print("¡ADVERTENCIA! No se encontró ningún puerto MIDI.")
         
         print(f"Puertos MIDI disponibles encontrados: {found_ports}")
         return found_ports
@@ -165,6 +196,29 @@ class MainWindow(QMainWindow):
         self.action_config = QAction("Editar Configuración...", self)
         self.action_config.triggered.connect(self.prompt_for_pin_and_open_config)
         avanzado_menu.addAction(self.action_config)
+
+        avanzado_menu.addSeparator()
+
+        self.action_profiling = QAction("Perfilado por Etapas", self)
+        self.action_profiling.setCheckable(True)
+        self.action_profiling.toggled.connect(self.toggle_stage_profiling)
+        avanzado_menu.addAction(self.action_profiling)
+
+        self.action_dump_profile = QAction("Volcar Perfil a Archivo...", self)
+        self.action_dump_profile.triggered.connect(self.dump_stage_profile)
+        avanzado_menu.addAction(self.action_dump_profile)
+
+        self.action_sample = QAction("Capturar Muestreo de la Pestaña Actual...", self)
+        self.action_sample.triggered.connect(self.capture_worker_samples)
+        avanzado_menu.addAction(self.action_sample)
+
+        self.action_lanes = QAction("Latencia por Carril MIDI", self)
+        self.action_lanes.triggered.connect(self.show_lane_latency)
+        avanzado_menu.addAction(self.action_lanes)
+
+        self.action_tuning_report = QAction("Informe de Latencia (Tuning RT)", self)
+        self.action_tuning_report.triggered.connect(self.show_tuning_report)
+        avanzado_menu.addAction(self.action_tuning_report)
         
         ayuda_menu = menu_bar.addMenu("Ayuda")
         self.action_about = QAction("Acerca de...", self)
@@ -175,15 +229,27 @@ class MainWindow(QMainWindow):
     def connect_signals(self):
         """Conecta las señales del sistema de pestañas."""
         self.tab_widget.tabCloseRequested.connect(self.close_maestro_tab)
+        self.pool_log_signal.connect(self.update_log)
+
+    def pick_midi_port_name(self):
+        """
+        Puerto MIDI para una pestaña nueva: el menos usado.
+        Los puertos se comparten (MidiOutputPool), así que nunca se agotan.
+        """
+        if not self.midi_port_names:
+            return None
+        usage = {name: 0 for name in self.midi_port_names}
+        for tab in self.maestro_tabs:
+            if tab.assigned_midi_port_name in usage:
+                usage[tab.assigned_midi_port_name] += 1
+        return min(self.midi_port_names, key=lambda name: usage[name])
 
     def add_maestro_tab(self):
         """Crea una nueva pestaña de Maestro y le asigna un puerto MIDI."""
         
-        assigned_port_name = None
-        if self.available_midi_port_names:
-            assigned_port_name = self.available_midi_port_names.pop(0)
-        else:
-            self.update_log("¡ERROR! No hay más puertos MIDI disponibles para asignar.", "red")
+        assigned_port_name = self.pick_midi_port_name()
+        if assigned_port_name is None:
+            self.update_log("¡ERROR! No hay puertos MIDI disponibles para asignar.", "red")
             
         tab_index = self.tab_widget.count()
         new_tab = MaestroTab(self, self.config, assigned_port_name, tab_index + 1)
@@ -193,7 +259,6 @@ class MainWindow(QMainWindow):
         new_tab.activity_signal.connect(
             lambda activity, tab=new_tab: self.update_global_midi_activity(tab, activity)
         )
-        new_tab.port_released_signal.connect(self.release_midi_port)
         
         tab_name = f"Maestro {len(self.maestro_tabs)}"
         self.tab_widget.addTab(new_tab, tab_name)
@@ -281,18 +346,114 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.update_log(f"Error al guardar config.json: {e}", "red")
 
+    def toggle_stage_profiling(self, checked):
+        """Activa/desactiva el perfilado por etapas en todos los workers."""
+        self.profiling_enabled = checked
+        for tab in self.maestro_tabs:
+            if checked:
+                tab.profiler.reset()
+            tab.profiler.enabled = checked
+        estado = "activado" if checked else "desactivado"
+        self.update_log(f"Perfilado por etapas {estado}.", "gray")
+
+    def dump_stage_profile(self):
+        """Escribe los acumulados por etapa de cada pestaña en un archivo de texto."""
+        path, _ = QFileDialog.getSaveFileName(self, "Volcar Perfil", "perfil_etapas.txt",
+                                              "Texto (*.txt)")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for i in range(self.tab_widget.count()):
+                    tab = self.tab_widget.widget(i)
+                    f.write(tab.profiler.report(self.tab_widget.tabText(i)) + "\n\n")
+            self.update_log(f"Perfil por etapas guardado en {path}", "green")
+        except Exception as e:
+            self.update_log(f"Error al guardar el perfil: {e}", "red")
+
+    def capture_worker_samples(self):
+        """Muestrea la pila del hilo worker de la pestaña actual durante N segundos."""
+        tab = self.tab_widget.currentWidget()
+        if tab is None or not tab.btn_connect.isChecked() or tab.profiler.thread_id is None:
+            self.update_log("Error: la pestaña actual no tiene un worker en marcha.", "red")
+            return
+
+        seconds, ok = QInputDialog.getInt(self, "Muestreo del Worker", "Duración (s):", 10, 1, 300)
+        if not ok:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Guardar Muestreo", "muestreo_worker.txt",
+                                              "Texto (*.txt)")
+        if not path:
+            return
+
+        sampler = SamplingProfiler(tab.profiler.thread_id, seconds, path)
+        self.samplers.append(sampler)
+        sampler.start()
+        self.update_log(f"Capturando muestreo del worker durante {seconds} s...", "blue")
+        QTimer.singleShot(seconds * 1000 + 500, lambda: self.report_sampler(sampler))
+
+    def report_sampler(self, sampler):
+        """Informa en el log del resultado de un muestreo (o reintenta si no terminó)."""
+        if not sampler.done:
+            QTimer.singleShot(250, lambda: self.report_sampler(sampler))
+            return
+        self.samplers.remove(sampler)
+        if sampler.error:
+            self.update_log(f"Error en el muestreo: {sampler.error}", "red")
+        else:
+            self.update_log(f"Muestreo guardado en {sampler.path} ({sampler.samples} muestras).", "green")
+
+    def apply_gc_policy(self):
+        """Congela los objetos del arranque y programa la recolección en reposo."""
+        idle_ms = self.config.get("rt_gc_idle_ms", 500)
+        self.gc_policy = GcPolicy(self.config.get("rt_gc_thresholds", [50000, 50, 100]),
+                                  idle_ms / 1000.0)
+        self.update_log(self.gc_policy.apply(), "gray")
+        if idle_ms > 0:
+            self.gc_timer = QTimer(self)
+            self.gc_timer.timeout.connect(self.collect_gc_if_idle)
+            self.gc_timer.start(idle_ms)
+
+    def collect_gc_if_idle(self):
+        last_rx = [tab.worker.last_rx for tab in self.maestro_tabs
+                   if tab.btn_connect.isChecked() and tab.worker]
+        self.gc_policy.collect_if_idle(last_rx)
+
+    def show_tuning_report(self):
+        """Cola de latencia del loop de cada worker (p99.9) y pausas del GC."""
+        for tab in self.maestro_tabs:
+            if not (tab.btn_connect.isChecked() and tab.worker):
+                continue
+            stats = tab.worker.loop_latency
+            tuning = ", ".join(tab.worker.tuning_status) or "sin tuning"
+            self.update_log(
+                f"Pestaña {tab.tab_index}: periodo del loop p50 {stats.percentile(50):.2f} "
+                f"p99 {stats.percentile(99):.2f} p99.9 {stats.percentile(99.9):.2f} "
+                f"max {stats.max_ms:.2f} ms ({stats.count} vueltas; {tuning})",
+                "blue"
+            )
+        for shared in list(self.midi_pool.outputs.values()):
+            if shared.tuning_status:
+                self.update_log(f"Escritor {shared.name}: {', '.join(shared.tuning_status)}", "blue")
+        if self.gc_policy:
+            self.update_log(self.gc_policy.report(), "blue")
+        else:
+            self.update_log("Tuning RT desactivado (rt_tuning=false): GC con política por defecto.", "gray")
+
+    def show_lane_latency(self):
+        """Escribe en el log la latencia llegada -> envío de cada carril y puerto."""
+        if not self.midi_pool.outputs:
+            self.update_log("No hay puertos MIDI abiertos todavía.", "gray")
+            return
+        for shared in list(self.midi_pool.outputs.values()):
+            for line in shared.lane_report():
+                self.update_log(line, "blue")
+
     def update_log(self, message, color):
         """Añade un mensaje al panel de log central"""
         hex_color = STATUS_COLORS.get(color, "black")
         self.log_box.append(f'<span style="color:{hex_color};">{message}</span>')
 
-    @Slot(str)
-    def release_midi_port(self, port_name):
-        """Devuelve un nombre de puerto MIDI al pool cuando se cierra una pestaña."""
-        if port_name and port_name not in self.available_midi_port_names:
-            self.available_midi_port_names.append(port_name)
-            self.update_log(f"Puerto '{port_name}' devuelto al pool.", "gray")
-
     def update_global_midi_activity(self, tab, msgs_per_sec):
         """Actualiza el contador MIDI global"""
         self.activity_counters[tab] = msgs_per_sec
@@ -328,4 +489,5 @@ class MainWindow(QMainWindow):
         self.update_log("Cerrando aplicación... deteniendo todos los hilos...", "gray")
         for tab in self.maestro_tabs:
             tab.stop_worker()
+        self.midi_pool.close_all()
         event.accept()
\ No newline at end of file
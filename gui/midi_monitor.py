@@ -0,0 +1,148 @@
+# Ubicación: gui/midi_monitor.py
+
+import time
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QCheckBox,
+                               QPushButton, QComboBox, QLabel, QListView)
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+
+MAX_ROWS = 2000
+MAX_TEXT = 120
+
+MESSAGE_TYPES = ("note_on", "note_off", "control_change", "program_change", "pitchwheel",
+                 "aftertouch", "polytouch", "sysex", "clock", "start", "stop",
+                 "continue", "active_sensing", "reset")
+
+
+class MidiMonitorModel(QAbstractListModel):
+    """
+    Lista virtualizada de eventos (como mucho MAX_ROWS). Guarda (t, msg) y
+    formatea solo las filas visibles en data(); no hay una señal por mensaje.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.t0 = time.perf_counter()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        t, msg = self.rows[index.row()]
+        text = str(msg)
+        if len(text) > MAX_TEXT:
+            text = text[:MAX_TEXT] + "..."
+        return f"{t - self.t0:10.3f}  {text}"
+
+    def append_rows(self, events):
+        if not events:
+            return
+        events = events[-MAX_ROWS:]
+        overflow = len(self.rows) + len(events) - MAX_ROWS
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            del self.rows[:overflow]
+            self.endRemoveRows()
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(events) - 1)
+        self.rows.extend(events)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows.clear()
+        self.endResetModel()
+
+
+class MidiMonitorWidget(QWidget):
+    """
+    Monitor MIDI de una pestaña. Un QTimer (refresh_ms) tira de EventRing,
+    filtra por canal/tipo y añade las filas en bloque. Con el monitor
+    apagado el worker no escribe en el ring; en pausa el ring sigue
+    girando y al reanudar se salta a lo más reciente.
+    """
+
+    def __init__(self, ring, refresh_ms=100, parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.seq = ring.head
+        self.lost = 0
+        self.shown = 0
+
+        self.model = MidiMonitorModel(self)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+
+        self.chk_enabled = QCheckBox("Activo")
+        self.btn_pause = QPushButton("Pausa")
+        self.btn_pause.setCheckable(True)
+        self.combo_channel = QComboBox()
+        self.combo_channel.addItem("Todos los canales", None)
+        for ch in range(16):
+            self.combo_channel.addItem(f"Canal {ch + 1}", ch)
+        self.combo_type = QComboBox()
+        self.combo_type.addItem("Todos los tipos", None)
+        for msg_type in MESSAGE_TYPES:
+            self.combo_type.addItem(msg_type, msg_type)
+        self.btn_clear = QPushButton("Limpiar")
+        self.label_stats = QLabel("")
+
+        controls.addWidget(self.chk_enabled)
+        controls.addWidget(self.btn_pause)
+        controls.addWidget(self.combo_channel)
+        controls.addWidget(self.combo_type)
+        controls.addWidget(self.btn_clear)
+        controls.addWidget(self.label_stats)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)  # sin medir cada fila
+        layout.addWidget(self.view)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(refresh_ms)
+
+        self.chk_enabled.toggled.connect(self.on_enabled)
+        self.btn_pause.toggled.connect(self.on_pause)
+        self.btn_clear.clicked.connect(self.model.clear)
+        self.timer.timeout.connect(self.pull)
+
+    def on_enabled(self, checked):
+        self.ring.enabled = checked
+        self.seq = self.ring.head
+        if checked:
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def on_pause(self, paused):
+        if not paused:
+            # Lo ocurrido durante la pausa no se muestra
+            self.seq = self.ring.head
+
+    def pull(self):
+        if self.btn_pause.isChecked():
+            return
+        events, self.seq, lost = self.ring.read_since(self.seq)
+        self.lost += lost
+
+        channel = self.combo_channel.currentData()
+        msg_type = self.combo_type.currentData()
+        if channel is not None or msg_type is not None:
+            events = [(t, msg) for t, msg in events
+                      if (msg_type is None or msg.type == msg_type)
+                      and (channel is None or getattr(msg, "channel", None) == channel)]
+
+        if events:
+            at_bottom = self.view.verticalScrollBar().value() == self.view.verticalScrollBar().maximum()
+            self.model.append_rows(events)
+            self.shown += len(events)
+            if at_bottom:
+                self.view.scrollToBottom()
+        self.label_stats.setText(f"{self.shown} mostrados, {self.lost} perdidos")
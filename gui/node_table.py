@@ -0,0 +1,103 @@
+# Ubicación: gui/node_table.py
+
+import time
+from PySide6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+COLUMNS = ("Nodo", "Modo", "Paleta", "Último Comando", "Comandos", "Visto", "Msgs", "msgs/seg")
+
+
+def format_clock(timestamp):
+    """Hora absoluta (no "hace N s") para que una fila solo cambie si cambia el nodo."""
+    if not timestamp:
+        return "-"
+    return time.strftime("%H:%M:%S", time.localtime(timestamp)) + f".{int(timestamp % 1 * 1000):03d}"
+
+
+class NodeTableModel(QAbstractTableModel):
+    """
+    Modelo virtualizado sobre un NodeStateTable: no copia datos, lee los
+    arrays al pintar. `refresh()` (llamado por un QTimer de la pestaña)
+    añade filas nuevas y emite dataChanged solo para las filas sucias.
+    """
+
+    def __init__(self, table, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.rows = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter) if index.column() else int(Qt.AlignCenter)
+        if role != Qt.DisplayRole:
+            return None
+
+        t = self.table
+        node = t.known[index.row()]
+        col = index.column()
+        if col == 0:
+            return str(node)
+        # Sin comandos todavía: modo/paleta desconocidos (cualquier valor es válido)
+        if col == 1:
+            return str(t.mode[node]) if t.cmd_count[node] else "-"
+        if col == 2:
+            return str(t.palette[node]) if t.cmd_count[node] else "-"
+        if col == 3:
+            return format_clock(t.last_cmd_time[node])
+        if col == 4:
+            return str(t.cmd_count[node])
+        if col == 5:
+            return format_clock(t.last_seen[node])
+        if col == 6:
+            return str(t.msg_count[node])
+        return f"{t.rate[node]:.1f}"
+
+    def refresh(self):
+        """Sincroniza con el worker: filas nuevas + dataChanged por rangos contiguos."""
+        known = len(self.table.known)
+        if known > self.rows:
+            self.beginInsertRows(QModelIndex(), self.rows, known - 1)
+            self.rows = known
+            self.endInsertRows()
+
+        dirty = [r for r in self.table.take_dirty() if r < self.rows]
+        last_col = len(COLUMNS) - 1
+        start = prev = None
+        for row in dirty:
+            if start is None:
+                start = prev = row
+            elif row == prev + 1:
+                prev = row
+            else:
+                self.dataChanged.emit(self.index(start, 0), self.index(prev, last_col))
+                start = prev = row
+        if start is not None:
+            self.dataChanged.emit(self.index(start, 0), self.index(prev, last_col))
+
+
+class NodeTableView(QTableView):
+    """Vista de nodos con filas de altura fija (sin medir contenido por fila)."""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setAlternatingRowColors(True)
+        self.verticalHeader().setVisible(False)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(20)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -0,0 +1,40 @@
+# Ubicación: services/latency_stats.py
+
+
+class LatencyStats:
+    """Histograma de latencias de memoria fija (apto para horas de operación)."""
+
+    BIN_MS = 0.1
+    N_BINS = 10000  # 1 s; lo que exceda cae en el último bin
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bins = [0] * (self.N_BINS + 1)
+        self.count = 0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.bins[min(int(ms / self.BIN_MS), self.N_BINS)] += 1
+        self.count += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        acc = 0
+        for i, n in enumerate(self.bins):
+            acc += n
+            if acc >= target:
+                if i == self.N_BINS:
+                    # Bin de desborde (> 1 s): sin resolución, el máximo es la cota honesta
+                    return self.max_ms
+                return min((i + 1) * self.BIN_MS, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return (f"p50 {self.percentile(50):.2f} p99 {self.percentile(99):.2f} "
+                f"max {self.max_ms:.2f} ms")
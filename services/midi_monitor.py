@@ -0,0 +1,39 @@
+# Ubicación: services/midi_monitor.py
+
+
+class EventRing:
+    """
+    Buffer circular de tamaño fijo para el monitor MIDI.
+
+    El worker escribe (`push`) sin locks ni señales Qt: una asignación en una
+    lista preasignada y un incremento de contador. La GUI lee a su ritmo con
+    `read_since(seq)`; si el worker dio la vuelta entera al buffer desde la
+    última lectura, los eventos pisados se cuentan como perdidos.
+    """
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.slots = [None] * size
+        self.head = 0          # total de eventos escritos (monótono)
+        self.enabled = False
+
+    def push(self, t, msg):
+        self.slots[self.head % self.size] = (t, msg)
+        self.head += 1
+
+    def read_since(self, seq):
+        """
+        Devuelve (eventos, nuevo_seq, perdidos) con lo escrito desde `seq`.
+        Lee `head` antes y después de copiar para descartar huecos pisados
+        por el worker durante la copia.
+        """
+        head = self.head
+        start = max(seq, head - self.size)
+        lost = start - seq
+        events = [self.slots[i % self.size] for i in range(start, head)]
+
+        overwritten = self.head - self.size - start
+        if overwritten > 0:
+            events = events[overwritten:]
+            lost += overwritten
+        return events, head, lost
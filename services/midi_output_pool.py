@@ -0,0 +1,254 @@
+# Ubicación: services/midi_output_pool.py
+
+import time
+import heapq
+import itertools
+import threading
+import mido
+
+from services.latency_stats import LatencyStats
+
+LANE_PRIORITY = "prioridad"
+LANE_BULK = "masivo"
+
+REOPEN_INTERVAL_S = 1.0  # espera mínima entre intentos de reabrir un puerto caído
+
+
+class SharedOutput:
+    """
+    Un puerto MIDI abierto una sola vez y compartido por varias pestañas.
+
+    Los workers entregan lotes de (t_llegada, msg); un único hilo escritor
+    por puerto los intercala en orden de llegada (heap) y los envía en lote.
+    Con merge_window_s > 0 el escritor retiene cada mensaje ese tiempo para
+    poder intercalar lotes que llegan tarde (orden estricto a cambio de
+    latencia); con 0 se ordena lo que haya en cola en cada pasada.
+
+    Carril de prioridad: `send_priority` envía desde el hilo del worker sin
+    pasar por la cola. `send_lock` se toma por mensaje, así que un mensaje
+    prioritario se cuela entre dos mensajes de un lote masivo en curso.
+
+    Un error de envío (p. ej. loopMIDI reiniciado) marca el puerto como
+    caído y se informa por `log`. Mientras está caído, los mensajes de
+    ambos carriles se descartan (y se cuentan) y el siguiente envío de
+    cualquiera de ellos intenta reabrirlo con `opener`, como mucho una vez
+    por REOPEN_INTERVAL_S.
+    """
+
+    def __init__(self, name, port, merge_window_s=0.0, thread_setup=None, opener=None, log=None):
+        self.name = name
+        self.port = port
+        self.merge_window_s = merge_window_s
+        self.thread_setup = thread_setup
+        self.opener = opener
+        self.log = log
+        self.broken = False
+        self.last_reopen = 0.0
+        self.tuning_status = []
+        self.clients = 0
+
+        self.heap = []
+        self.seq = itertools.count()  # desempate estable entre mismos tiempos
+        self.cond = threading.Condition()
+        self.send_lock = threading.Lock()
+        self.lanes = {LANE_PRIORITY: LatencyStats(), LANE_BULK: LatencyStats()}
+        self.dropped = {LANE_PRIORITY: 0, LANE_BULK: 0}  # descartados con el puerto caído
+        self.error = None
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name=f"midi-out {name}", daemon=True)
+        self.thread.start()
+
+    def submit(self, items):
+        """Encola un lote de (t_llegada, msg) ya ordenado por su worker."""
+        with self.cond:
+            for t, msg in items:
+                heapq.heappush(self.heap, (t, next(self.seq), msg))
+            self.cond.notify()
+
+    def take_error(self):
+        with self.cond:
+            error, self.error = self.error, None
+        return error
+
+    def fail(self, e, from_writer=False):
+        """
+        Registra un error de envío; solo el primero de cada caída va al log.
+        `error` (lo que reporta el siguiente send_batch) solo guarda los
+        fallos del propio escritor, una vez por caída.
+        """
+        with self.cond:
+            was_broken, self.broken = self.broken, True
+            if from_writer and not was_broken:
+                self.error = e
+        if not was_broken and self.log:
+            self.log(f"Puerto MIDI {self.name} caído: {e}", "red")
+
+    def reopen_due(self):
+        """True (y reserva el intento) si toca reintentar la apertura."""
+        with self.cond:
+            now = time.perf_counter()
+            if now - self.last_reopen < REOPEN_INTERVAL_S:
+                return False
+            self.last_reopen = now
+            return True
+
+    def reopen(self):
+        """Cierra y vuelve a abrir el puerto. Devuelve True si quedó operativo."""
+        if self.opener is None:
+            return False
+        with self.send_lock:
+            try:
+                self.port.close()
+            except Exception:
+                pass  # el handle viejo ya estaba roto
+            try:
+                self.port = self.opener(self.name)
+            except Exception as e:
+                if self.log:
+                    self.log(f"No se pudo reabrir {self.name}: {e}", "orange")
+                return False
+            with self.cond:
+                self.broken = False
+                self.error = None  # lo pendiente es de la caída ya resuelta
+        if self.log:
+            self.log(f"Puerto MIDI {self.name} reabierto.", "green")
+        return True
+
+    def run(self):
+        if self.thread_setup:
+            self.tuning_status = self.thread_setup()
+        while True:
+            with self.cond:
+                while self.running and not self.heap:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                cutoff = time.perf_counter() - self.merge_window_s
+                if self.merge_window_s and self.heap[0][0] > cutoff:
+                    self.cond.wait(self.heap[0][0] - cutoff)
+                    continue
+                batch = []
+                while self.heap and self.heap[0][0] <= cutoff:
+                    batch.append(heapq.heappop(self.heap))
+                if not self.merge_window_s:
+                    while self.heap:
+                        batch.append(heapq.heappop(self.heap))
+
+            if self.broken and self.reopen_due():
+                self.reopen()
+            if self.broken:
+                self.dropped[LANE_BULK] += len(batch)
+                continue
+
+            bulk = self.lanes[LANE_BULK]
+            for i, (t, _, msg) in enumerate(batch):
+                try:
+                    with self.send_lock:
+                        self.port.send(msg)
+                    bulk.add((time.perf_counter() - t) * 1000.0)
+                except Exception as e:
+                    # Puerto caído: el resto del lote se descarta
+                    self.fail(e, from_writer=True)
+                    self.dropped[LANE_BULK] += len(batch) - i
+                    break
+
+    def send_priority(self, t, msg):
+        """
+        Carril rápido: envía ya, por delante de lo que haya en la cola masiva.
+        No lanza: con el puerto caído el mensaje se descarta y se cuenta
+        (la caída ya se informó una vez por `log`).
+        """
+        if self.broken and self.reopen_due():
+            self.reopen()
+        if self.broken:
+            self.dropped[LANE_PRIORITY] += 1
+            return
+        try:
+            with self.send_lock:
+                self.port.send(msg)
+                self.lanes[LANE_PRIORITY].add((time.perf_counter() - t) * 1000.0)
+        except Exception as e:
+            self.fail(e)
+            self.dropped[LANE_PRIORITY] += 1
+
+    def lane_report(self):
+        """Una línea por carril con la latencia llegada -> envío."""
+        return [f"{self.name} [{lane}] {stats.count} msgs, {stats.summary()}, "
+                f"{self.dropped[lane]} descartados con el puerto caído"
+                for lane, stats in self.lanes.items()]
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=1.0)
+        try:
+            self.port.close()
+        except Exception:
+            pass  # un puerto caído puede fallar también al cerrar
+
+
+class OutputClient:
+    """Vista de un SharedOutput para un worker (lo que antes era el puerto mido)."""
+
+    def __init__(self, shared):
+        self.shared = shared
+        self.name = shared.name
+
+    def send_batch(self, items):
+        self.shared.submit(items)
+        # Los errores del escritor se reportan en el siguiente lote
+        error = self.shared.take_error()
+        if error is not None:
+            raise IOError(error)
+
+    def send_now(self, t, msg):
+        self.shared.send_priority(t, msg)
+
+
+class MidiOutputPool:
+    """
+    Handles MIDI persistentes: un puerto se abre la primera vez que una
+    pestaña lo pide y queda abierto hasta cerrar la app, así una
+    reconexión no paga la latencia de mido.open_output. Un puerto marcado
+    como caído se reabre en su escritor o, a más tardar, en el siguiente
+    `acquire`.
+
+    `log(mensaje, color)` recibe los errores de los escritores; se llama
+    desde sus hilos, así que debe ser seguro entre hilos (p. ej. emitir
+    una señal Qt).
+    """
+
+    def __init__(self, merge_window_s=0.0, thread_setup=None, log=None):
+        self.merge_window_s = merge_window_s
+        self.thread_setup = thread_setup  # ajuste RT de los hilos escritores
+        self.log = log
+        self.outputs = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, name):
+        """Devuelve un OutputClient para `name` (abre el puerto si hace falta)."""
+        with self.lock:
+            shared = self.outputs.get(name)
+            if shared is None:
+                shared = SharedOutput(name, mido.open_output(name), self.merge_window_s,
+                                      self.thread_setup, mido.open_output, self.log)
+                self.outputs[name] = shared
+            elif shared.broken and not shared.reopen():
+                raise IOError(f"El puerto MIDI {name} sigue caído.")
+            shared.clients += 1
+        return OutputClient(shared)
+
+    def release(self, client):
+        with self.lock:
+            client.shared.clients = max(0, client.shared.clients - 1)
+
+    def clients(self, name):
+        shared = self.outputs.get(name)
+        return shared.clients if shared else 0
+
+    def close_all(self):
+        with self.lock:
+            for shared in self.outputs.values():
+                shared.close()
+            self.outputs.clear()
@@ -0,0 +1,111 @@
+# Ubicación: services/node_state.py
+
+from array import array
+
+# Cómo se atribuye un mensaje de subida a un nodo
+NODE_KEY_CHANNEL = "channel"              # nodo = canal MIDI (0-15)
+NODE_KEY_CHANNEL_DATA1 = "channel_data1"  # nodo = canal * 128 + primer byte de datos
+
+# Rango del typecode "h" de mode/palette
+FIELD_MIN = -32768
+FIELD_MAX = 32767
+
+
+class NodeStateTable:
+    """
+    Estado de nodos en arrays preasignados (uno por campo, indexados por id
+    de nodo) en lugar de un dict de objetos: cientos de nodos cuestan unos
+    pocos KB y el worker solo escribe enteros/floats en su hilo.
+
+    La GUI lee desde otro hilo: cada escritura marca la fila en `dirty` y
+    `take_dirty()` devuelve y limpia esas marcas para repintar solo lo
+    que cambió.
+    """
+
+    def __init__(self, max_nodes=512, uplink_key=NODE_KEY_CHANNEL):
+        self.max_nodes = max_nodes
+        self.uplink_key = uplink_key
+
+        self.mode = array("h", [-1]) * max_nodes
+        self.palette = array("h", [-1]) * max_nodes
+        self.last_cmd_time = array("d", [0.0]) * max_nodes
+        self.cmd_count = array("q", [0]) * max_nodes
+        self.last_seen = array("d", [0.0]) * max_nodes
+        self.msg_count = array("q", [0]) * max_nodes
+        self.window_count = array("q", [0]) * max_nodes
+        self.rate = array("f", [0.0]) * max_nodes
+
+        # Nodos conocidos en orden de aparición (fila -> nodo) y su inversa
+        self.known = array("i")
+        self.row_of = array("i", [-1]) * max_nodes
+        self.dirty = bytearray(max_nodes)
+        self.out_of_range = 0   # ids de nodo o valores de comando no representables
+        self.last_roll = 0.0    # 0 = ventana sin abrir
+
+    def node_for(self, status, d1):
+        """Id de nodo para un mensaje de canal (status 0x80-0xEF)."""
+        if self.uplink_key == NODE_KEY_CHANNEL_DATA1:
+            return (status & 0x0F) * 128 + d1
+        return status & 0x0F
+
+    def _touch(self, node):
+        if self.row_of[node] < 0:
+            self.row_of[node] = len(self.known)
+            self.known.append(node)
+        self.dirty[node] = 1
+
+    def seen(self, node, now):
+        """Mensaje de subida atribuido a `node`."""
+        if not 0 <= node < self.max_nodes:
+            self.out_of_range += 1
+            return
+        self.last_seen[node] = now
+        self.msg_count[node] += 1
+        self.window_count[node] += 1
+        self._touch(node)
+
+    def commanded(self, node, mode, palette, now):
+        """Comando de bajada `C,node,mode,palette` escrito al Maestro."""
+        if not (0 <= node < self.max_nodes and FIELD_MIN <= mode <= FIELD_MAX
+                and FIELD_MIN <= palette <= FIELD_MAX):
+            # El comando ya se escribió; solo se deja de reflejar en la tabla
+            self.out_of_range += 1
+            return
+        self.mode[node] = mode
+        self.palette[node] = palette
+        self.last_cmd_time[node] = now
+        self.cmd_count[node] += 1
+        self._touch(node)
+
+    def reset_window(self, now):
+        """Abre una ventana de tasas nueva (al conectar/reconectar el puerto)."""
+        self.last_roll = now
+        for node in self.known:
+            self.window_count[node] = 0
+
+    def roll_rates(self, now):
+        """Cierra la ventana de tasas (msgs/seg por nodo). Llamar ~1 vez/seg."""
+        if not self.last_roll:
+            self.reset_window(now)
+            return
+        dt = now - self.last_roll
+        self.last_roll = now
+        if dt <= 0:
+            return
+        for node in self.known:
+            count = self.window_count[node]
+            if count or self.rate[node]:
+                self.rate[node] = count / dt
+                self.window_count[node] = 0
+                self.dirty[node] = 1
+
+    def take_dirty(self):
+        """Devuelve las filas cambiadas (ordenadas) y limpia sus marcas."""
+        rows = []
+        for node in self.known:
+            if self.dirty[node]:
+                # Limpiar antes de leer: si el worker escribe después, vuelve a marcar
+                self.dirty[node] = 0
+                rows.append(self.row_of[node])
+        rows.sort()
+        return rows
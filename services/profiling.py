@@ -0,0 +1,100 @@
+# Ubicación: services/profiling.py
+
+import os
+import sys
+import time
+import threading
+
+# Etapas numeradas de SerialWorker.run() (ver README, sección 6)
+STAGE_NAMES = (
+    "1. Conexión",
+    "2. Bajada",
+    "3. Lectura",
+    "4. Parseo",
+    "5. Flush",
+    "6. Actividad",
+    "7. Silencio",
+)
+STAGE_CONNECT, STAGE_DOWNLINK, STAGE_READ, STAGE_PARSE, STAGE_FLUSH, STAGE_ACTIVITY, STAGE_SILENCE = range(7)
+
+
+class StageProfiler:
+    """
+    Acumula tiempo (perf_counter_ns) y número de llamadas por etapa del worker.
+    Desactivado no cuesta más que leer `enabled` una vez por vuelta del loop.
+    Vive en la pestaña, así que sobrevive a las reconexiones del worker.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.thread_id = None
+        self.reset()
+
+    def reset(self):
+        self.total_ns = [0] * len(STAGE_NAMES)
+        self.calls = [0] * len(STAGE_NAMES)
+        self.loops = 0
+
+    def lap(self, stage, t0):
+        """Suma el tiempo desde `t0` a `stage` y devuelve el instante actual."""
+        t1 = time.perf_counter_ns()
+        self.total_ns[stage] += t1 - t0
+        self.calls[stage] += 1
+        return t1
+
+    def report(self, title):
+        """Devuelve una tabla de texto con los acumulados por etapa."""
+        total_ns = sum(self.total_ns) or 1
+        lines = [f"== {title} ({self.loops} vueltas) ==",
+                 f"{'Etapa':<14}{'Llamadas':>12}{'Total ms':>12}{'Media us':>12}{'%':>8}"]
+        for name, ns, calls in zip(STAGE_NAMES, self.total_ns, self.calls):
+            mean_us = ns / calls / 1000.0 if calls else 0.0
+            lines.append(f"{name:<14}{calls:>12}{ns / 1e6:>12.2f}{mean_us:>12.2f}{100.0 * ns / total_ns:>8.1f}")
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """
+    Muestreo de pila de UN hilo (el del worker) durante un tiempo fijo.
+    Usa sys._current_frames() desde un hilo propio: no requiere reiniciar
+    la app ni adjuntar un depurador. Guarda pilas en formato "collapsed"
+    (una línea `a;b;c N` por pila), compatible con flamegraph.pl/speedscope.
+    """
+
+    def __init__(self, thread_id, duration_s, path, interval_s=0.001):
+        self.thread_id = thread_id
+        self.duration_s = duration_s
+        self.path = path
+        self.interval_s = interval_s
+        self.samples = 0
+        self.done = False
+        self.error = None
+        self.stacks = {}
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        deadline = time.perf_counter() + self.duration_s
+        try:
+            while time.perf_counter() < deadline:
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is None:
+                    break  # El worker terminó
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+                time.sleep(self.interval_s)
+
+            with open(self.path, "w", encoding="utf-8") as f:
+                for key, count in sorted(self.stacks.items(), key=lambda kv: -kv[1]):
+                    f.write(f"{key} {count}\n")
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
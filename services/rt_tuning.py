@@ -0,0 +1,118 @@
+# Ubicación: services/rt_tuning.py
+
+import gc
+import os
+import sys
+import time
+import threading
+
+from services.latency_stats import LatencyStats
+
+THREAD_PRIORITY_TIME_CRITICAL = 15  # Windows
+SCHED_FIFO_PRIORITY = 10            # Linux: bajo dentro del rango RT (1-99)
+
+
+def apply_thread_tuning(cpus, realtime):
+    """
+    Ajusta el hilo QUE LLAMA (worker o escritor MIDI): afinidad de CPU y
+    clase de planificación de tiempo real. Devuelve una lista de líneas de
+    estado; un permiso denegado no es un error, solo se informa.
+    """
+    status = []
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        handle = kernel32.GetCurrentThread()
+        if cpus:
+            mask = sum(1 << cpu for cpu in cpus)
+            if kernel32.SetThreadAffinityMask(handle, mask):
+                status.append(f"afinidad CPU {list(cpus)}")
+            else:
+                status.append(f"afinidad rechazada (error {ctypes.get_last_error()})")
+        if realtime:
+            if kernel32.SetThreadPriority(handle, THREAD_PRIORITY_TIME_CRITICAL):
+                status.append("prioridad TIME_CRITICAL")
+            else:
+                status.append(f"prioridad rechazada (error {ctypes.get_last_error()})")
+        return status
+
+    tid = threading.get_native_id()
+    if cpus:
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(tid, cpus)
+                status.append(f"afinidad CPU {sorted(os.sched_getaffinity(tid))}")
+            except OSError as e:
+                status.append(f"afinidad rechazada ({e})")
+        else:
+            status.append("afinidad no soportada en esta plataforma")
+    if realtime:
+        if hasattr(os, "sched_setscheduler"):
+            try:
+                os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(SCHED_FIFO_PRIORITY))
+                status.append(f"SCHED_FIFO {SCHED_FIFO_PRIORITY}")
+            except OSError as e:
+                # Sin CAP_SYS_NICE / rtprio: se queda en la clase normal
+                status.append(f"SCHED_FIFO rechazado ({e})")
+        else:
+            status.append("planificación RT no soportada en esta plataforma")
+    return status
+
+
+def thread_tuning_from_config(config):
+    """Devuelve un callable para ajustar hilos según config, o None si el modo está apagado."""
+    if not config.get("rt_tuning", False):
+        return None
+    cpus = tuple(config.get("rt_cpus", []))
+    realtime = config.get("rt_realtime_priority", True)
+    return lambda: apply_thread_tuning(cpus, realtime)
+
+
+class GcPolicy:
+    """
+    Política del recolector cíclico (afecta a todo el proceso):
+    - gc.freeze() tras el arranque: los objetos de larga vida (GUI, módulos)
+      pasan a la generación permanente y no se vuelven a recorrer.
+    - Umbrales altos: menos recolecciones automáticas en mitad del tráfico.
+    - collect_if_idle(): recolección explícita en huecos sin tráfico.
+    Mide cada pausa del GC con gc.callbacks para contrastarla con la cola
+    de latencia de los workers.
+    """
+
+    def __init__(self, thresholds=(50000, 50, 100), idle_gap_s=0.5):
+        self.thresholds = tuple(thresholds)
+        self.idle_gap_s = idle_gap_s
+        self.pauses = LatencyStats()
+        self.idle_collections = 0
+        self._gc_start = 0.0
+
+    def apply(self):
+        gc.collect()
+        gc.freeze()
+        gc.set_threshold(*self.thresholds)
+        gc.callbacks.append(self.on_gc)
+        return f"GC: {gc.get_freeze_count()} objetos congelados, umbrales {gc.get_threshold()}"
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start:
+            self.pauses.add((time.perf_counter() - self._gc_start) * 1000.0)
+            self._gc_start = 0.0
+
+    def collect_if_idle(self, last_rx_times):
+        """Recolecta (gen 0-1) si ningún worker recibió bytes en idle_gap_s."""
+        now = time.time()
+        if all(now - t > self.idle_gap_s for t in last_rx_times):
+            gc.collect(1)
+            self.idle_collections += 1
+            return True
+        return False
+
+    def report(self):
+        p = self.pauses
+        return (f"Pausas GC: {p.count} (p99 {p.percentile(99):.2f} p99.9 {p.percentile(99.9):.2f} "
+                f"max {p.max_ms:.2f} ms), recolecciones en reposo: {self.idle_collections}")
@@ -1,11 +1,40 @@
 import sys
 import time
 import queue
+import threading
 import serial
 import serial.tools.list_ports
 import mido
 from PySide6.QtCore import QThread, Signal, QObject, Slot 
 
+from services.sysex import SysExAssembler, STATUS_BYTE_RE, SYSEX_START, SYSEX_END
+from services.node_state import NodeStateTable
+from services.midi_monitor import EventRing
+from services.latency_stats import LatencyStats
+from services.rt_tuning import thread_tuning_from_config
+from services.profiling import (StageProfiler, STAGE_CONNECT, STAGE_DOWNLINK, STAGE_READ,
+                                STAGE_PARSE, STAGE_FLUSH, STAGE_ACTIVITY, STAGE_SILENCE)
+
+# Bytes de tiempo real (0xF8-0xFF): un solo byte, pueden llegar intercalados
+# en mitad de cualquier otro mensaje. 0xF9 y 0xFD no están definidos.
+REALTIME_BYTES = bytes(range(0xF8, 0x100))
+UNDEFINED_REALTIME = (0xF9, 0xFD)
+
+DEFAULT_PRIORITY_TYPES = ("clock", "start", "continue", "stop", "active_sensing", "reset")
+
+
+def parse_heartbeat_pattern(text):
+    """
+    Convierte el patrón de latido del config ("FE", "F0 7D 01 F7"...) a bytes.
+    Un patrón vacío desactiva la detección rápida de vida; uno inválido
+    devuelve None.
+    """
+    try:
+        return bytes.fromhex(text or "")
+    except ValueError:
+        return None
+
+
 class SerialWorker(QObject):
     """
     Worker de HILO ÚNICO (v3.2 - Asignación de Puerto Único).
@@ -16,18 +45,47 @@ class SerialWorker(QObject):
     status_signal = Signal(str, str)
     activity_signal = Signal(int)
     com_ports_signal = Signal(list)
+    failover_signal = Signal(dict)
     finished = Signal()
 
-    def __init__(self, config, midi_output_port): # <-- CAMBIO: Ya no es una lista
+    def __init__(self, config, midi_output_port, profiler=None, nodes=None, monitor=None): # <-- CAMBIO: Ya no es una lista
         super().__init__()
         
         self.config = config
         self.midi_output_port = midi_output_port # <-- CAMBIO: Almacena el puerto único
+        self.profiler = profiler or StageProfiler()
+        # Tipos mido que van por el carril de prioridad (sin esperar al flush)
+        self.priority_types = frozenset(config.get('priority_types', DEFAULT_PRIORITY_TYPES))
+        # Periodo real de cada vuelta del loop (objetivo ~1 ms): su cola
+        # (p99.9) delata pausas del planificador o del GC.
+        self.loop_latency = LatencyStats()
+        self.last_rx = time.time()
+        self.tuning_status = []
+        self.nodes = nodes or NodeStateTable(config.get('max_nodes', 512),
+                                             config.get('node_uplink_key', "channel"))
+        self.monitor = monitor or EventRing(config.get('monitor_buffer', 4096))
         
         self.running = False
         self.ser = None
         self.command_queue = queue.Queue()
 
+        # --- Detección de vida y puerto de respaldo ---
+        self.primary_port = config['com_port']
+        self.standby_port = config.get('standby_com_port') or None
+        self.active_port = self.primary_port
+        self.heartbeat_text = config.get('heartbeat_pattern', "FE")
+        self.heartbeat = parse_heartbeat_pattern(self.heartbeat_text)
+        self.liveness_timeout_s = config.get('liveness_timeout_ms', 350) / 1000.0
+        self.failover_started = None
+        self.failover_from = None
+        self.liveness_metrics = {
+            "failovers": 0,
+            "last_detection_ms": None,
+            "last_failover_ms": None,
+            "max_detection_ms": 0.0,
+            "max_failover_ms": 0.0,
+        }
+
     def stop(self):
         self.running = False
         # Enviar None a la cola para despertar al hilo de escritura (si está bloqueado)
@@ -36,58 +94,186 @@ class SerialWorker(QObject):
 
     @Slot(int, int, int)
     def send_command(self, node_id, mode, palette):
-        cmd = f"C,{node_id},{mode},{palette}\n"
-        self.command_queue.put(cmd)
+        self.command_queue.put((node_id, mode, palette))
 
     def scan_com_ports(self):
         ports = [port.device for port in serial.tools.list_ports.comports()]
         self.com_ports_signal.emit(ports)
 
+    def dispatch(self, arrival, msg, midi_queue):
+        """Envía ya los tipos prioritarios; el resto espera al siguiente flush."""
+        if self.monitor.enabled:
+            self.monitor.push(arrival, msg)
+        if msg.type in self.priority_types and self.midi_output_port:
+            # Sin log por mensaje: una caída del puerto la informa el pool una vez
+            self.midi_output_port.send_now(arrival, msg)
+        else:
+            midi_queue.put((arrival, msg))
+
+    def switch_port(self):
+        """Alterna entre el puerto principal y el de respaldo (si existe)."""
+        if not self.standby_port:
+            return
+        if self.active_port == self.primary_port:
+            self.active_port = self.standby_port
+        else:
+            self.active_port = self.primary_port
+
+    def declare_port_dead(self, silence_s, reason):
+        """
+        Cierra el puerto activo, registra el tiempo de detección y
+        conmuta al puerto de respaldo (o reconecta el mismo si no hay).
+        El tiempo de conmutación se mide al completar la siguiente conexión.
+        """
+        detection_ms = silence_s * 1000.0
+        self.liveness_metrics["last_detection_ms"] = detection_ms
+        self.liveness_metrics["max_detection_ms"] = max(
+            self.liveness_metrics["max_detection_ms"], detection_ms)
+
+        dead_port = self.active_port
+        if self.ser:
+            self.ser.close()
+        self.ser = None
+
+        if not self.standby_port:
+            self.log_signal.emit(
+                f"Puerto {dead_port} sin vida ({reason}, {detection_ms:.0f} ms). Reconectando...",
+                "orange"
+            )
+            return
+
+        self.switch_port()
+        self.start_failover(dead_port)
+        self.log_signal.emit(
+            f"Puerto {dead_port} sin vida ({reason}, {detection_ms:.0f} ms). "
+            f"Conmutando a {self.active_port}...",
+            "orange"
+        )
+
+    def start_failover(self, dead_port):
+        """Marca el inicio de una conmutación (si no hay otra en curso)."""
+        if self.failover_started is None:
+            self.failover_started = time.time()
+            self.failover_from = dead_port
+
+    def record_failover(self):
+        """
+        Llamado tras una conexión exitosa. Solo cuenta como conmutación si
+        el puerto conectado no es el que se declaró muerto.
+        """
+        if self.failover_started is None:
+            return
+        failover_ms = (time.time() - self.failover_started) * 1000.0
+        dead_port = self.failover_from
+        self.failover_started = None
+        self.failover_from = None
+        if self.active_port == dead_port:
+            return
+
+        metrics = self.liveness_metrics
+        metrics["failovers"] += 1
+        metrics["last_failover_ms"] = failover_ms
+        metrics["max_failover_ms"] = max(metrics["max_failover_ms"], failover_ms)
+        self.failover_signal.emit(dict(metrics, port=self.active_port))
+
     def run(self):
         """
         El Loop Principal del Worker.
         """
         self.running = True
-        self.log_signal.emit(f"Iniciando worker para {self.config['com_port']}", "gray")
+        self.log_signal.emit(f"Iniciando worker para {self.active_port}", "gray")
+        if self.heartbeat is None:
+            self.log_signal.emit(
+                f"Patrón de latido inválido ('{self.heartbeat_text}'): detección rápida desactivada, "
+                f"solo se usa max_silence_s.",
+                "orange"
+            )
+            self.heartbeat = b""
+
+        prof = self.profiler
+        prof.thread_id = threading.get_ident()
+
+        tuning = thread_tuning_from_config(self.config)
+        if tuning:
+            self.tuning_status = tuning()
+            self.log_signal.emit(f"Tuning RT del worker: {', '.join(self.tuning_status) or 'sin cambios'}", "gray")
+        loop_prev = time.perf_counter()
 
         buf = bytearray()
         rs_status = None
         last_byte_time = time.time()
+
+        # El latido rápido solo se "arma" cuando el puerto actual ya envió
+        # al menos un latido; así un Maestro sin Active Sensing no oscila.
+        liveness_armed = False
+        hb_tail = b""
         midi_msg_count = 0
         last_stat_time = time.time()
         
-        midi_queue = queue.Queue()
+        sysex = SysExAssembler(self.config.get('sysex_max_bytes', 4096),
+                               self.config.get('sysex_chunk_bytes', 0),
+                               self.config.get('sysex_timeout_ms', 1000) / 1000.0)
+        last_sysex_dropped = 0
+
+        midi_queue = queue.Queue()   # (t_llegada, msg): t ordena el merge entre pestañas
+        arrival = time.perf_counter()
         flush_window_s = self.config['flush_ms'] / 1000.0
         last_flush_time = time.time()
 
         while self.running:
+            loop_now = time.perf_counter()
+            if self.ser is not None:  # sin puerto solo mediríamos las esperas de reconexión
+                self.loop_latency.add((loop_now - loop_prev) * 1000.0)
+            loop_prev = loop_now
+
+            profiling = prof.enabled
+            if profiling:
+                prof.loops += 1
+                t_stage = time.perf_counter_ns()
             try:
                 # --- 1. Intento de Conexión / Reconexión ---
                 if self.ser is None or not self.ser.is_open:
                     if self.running:
                         self.status_signal.emit(f"Reconectando...", "orange")
-                        self.log_signal.emit(f"Intentando conectar a {self.config['com_port']}...", "orange")
+                        self.log_signal.emit(f"Intentando conectar a {self.active_port}...", "orange")
                         try:
-                            self.ser = serial.Serial(self.config['com_port'], 
+                            self.ser = serial.Serial(self.active_port, 
                                                      self.config['baudrate'], 
                                                      timeout=0) # NO BLOQUEANTE
                             self.status_signal.emit("Conectado", "green")
-                            self.log_signal.emit(f"¡Éxito! Conectado a {self.config['com_port']}.", "green")
+                            self.log_signal.emit(f"¡Éxito! Conectado a {self.active_port}.", "green")
                             last_byte_time = time.time()
+                            self.nodes.reset_window(last_byte_time)
+                            liveness_armed = False
+                            hb_tail = b""
+                            buf.clear()
+                            rs_status = None
+                            sysex.abort()
+                            self.record_failover()
                         except serial.SerialException as e:
                             self.status_signal.emit("Error de Puerto", "red")
-                            self.log_signal.emit(f"Error al abrir {self.config['com_port']}: {e}", "red")
+                            self.log_signal.emit(f"Error al abrir {self.active_port}: {e}", "red")
+                            # Si hay respaldo, el siguiente intento usa el otro puerto
+                            self.switch_port()
+                            if profiling:
+                                prof.lap(STAGE_CONNECT, t_stage)
                             time.sleep(2)
                             continue
+                if profiling:
+                    t_stage = prof.lap(STAGE_CONNECT, t_stage)
                 
                 # --- 2. Vía de Bajada (Enviar Comandos) ---
                 while not self.command_queue.empty():
-                    cmd = self.command_queue.get()
-                    if cmd is None:
+                    item = self.command_queue.get()
+                    if item is None:
                         self.running = False
                         break
-                    self.ser.write(cmd.encode('ascii'))
-                    self.log_signal.emit(f"Comando enviado al Maestro: {cmd.strip()}", "blue")
+                    cmd = "C,{},{},{}".format(*item)
+                    self.ser.write((cmd + "\n").encode('ascii'))
+                    self.nodes.commanded(*item, time.time())
+                    self.log_signal.emit(f"Comando enviado al Maestro: {cmd}", "blue")
+                if profiling:
+                    t_stage = prof.lap(STAGE_DOWNLINK, t_stage)
 
                 if not self.running:
                     continue
@@ -97,13 +283,66 @@ class SerialWorker(QObject):
                 if bytes_to_read > 0:
                     chunk = self.ser.read(bytes_to_read)
                     last_byte_time = time.time()
-                    buf.extend(chunk)
+                    self.last_rx = last_byte_time
+                    arrival = time.perf_counter()
+
+                    # Latido (Active Sensing u otro patrón configurado)
+                    if self.heartbeat:
+                        window = hb_tail + chunk
+                        if self.heartbeat in window:
+                            liveness_armed = True
+                        keep = len(self.heartbeat) - 1
+                        hb_tail = window[-keep:] if keep else b""
+
+                    # Los bytes de tiempo real se extraen antes del parser:
+                    # son de un byte y pueden partir cualquier otro mensaje.
+                    data = chunk.translate(None, REALTIME_BYTES)
+                    if len(data) != len(chunk):
+                        for b in chunk:
+                            if b >= 0xF8 and b not in UNDEFINED_REALTIME:
+                                self.dispatch(arrival, mido.Message.from_bytes([b]), midi_queue)
+                                midi_msg_count += 1
+                    buf.extend(data)
+                if profiling:
+                    t_stage = prof.lap(STAGE_READ, t_stage)
 
                 # --- 4. Parseo MIDI (robusto frente a basura) ---
                 processed = 0
-                # Necesitamos al menos 3 bytes para intentar un mensaje completo
-                while len(buf) - processed >= 3:
+                parse_time = time.time()
+                sysex.check_timeout(parse_time)
+                while processed < len(buf):
+                    # SysEx en curso: copiar datos de golpe hasta el próximo STATUS
+                    if sysex.active:
+                        m = STATUS_BYTE_RE.search(buf, processed)
+                        end = m.start() if m else len(buf)
+                        sysex.feed(buf, processed, end, last_byte_time)
+                        processed = end
+                        if m is None:
+                            break
+                        if buf[end] == SYSEX_END:
+                            for msg in sysex.finish():
+                                self.dispatch(arrival, msg, midi_queue)
+                                midi_msg_count += 1
+                            processed += 1
+                        else:
+                            # Otro STATUS sin 0xF7: SysEx sin terminar, se procesa el STATUS
+                            sysex.abort()
+                        continue
+
                     b0 = buf[processed]
+                    if b0 == SYSEX_START:
+                        sysex.start(time.time())
+                        rs_status = None
+                        processed += 1
+                        continue
+                    if b0 == SYSEX_END:
+                        # 0xF7 huérfano (p. ej. cola de un SysEx ya descartado)
+                        processed += 1
+                        continue
+
+                    # Necesitamos al menos 3 bytes para intentar un mensaje completo
+                    if len(buf) - processed < 3:
+                        break
 
                     if b0 & 0x80:
                         # Nuevo STATUS: asumimos mensaje de 3 bytes (status + 2 datos)
@@ -138,23 +377,32 @@ class SerialWorker(QObject):
                         continue
 
                     # Si llegamos aquí, el mensaje es válido
-                    midi_queue.put(msg)
+                    self.dispatch(arrival, msg, midi_queue)
                     midi_msg_count += 1
                     processed += bytes_consumidos
+                    if status < 0xF0:
+                        self.nodes.seen(self.nodes.node_for(status, d1), parse_time)
 
                 if processed > 0:
                     del buf[:processed]
+                if profiling:
+                    t_stage = prof.lap(STAGE_PARSE, t_stage)
 
                 # --- 5. Flusher MIDI ---
                 # ¡CAMBIO! Solo enviar si tenemos un puerto asignado
+                # El lote va al escritor compartido del puerto (services/midi_output_pool.py)
                 if self.midi_output_port and (time.time() - last_flush_time > flush_window_s):
+                    batch = []
                     while not midi_queue.empty():
-                        msg_to_send = midi_queue.get()
+                        batch.append(midi_queue.get())
+                    if batch:
                         try:
-                            self.midi_output_port.send(msg_to_send)
+                            self.midi_output_port.send_batch(batch)
                         except Exception as e:
                             self.log_signal.emit(f"Error al enviar a MIDI ({self.midi_output_port.name}): {e}", "red")
                     last_flush_time = time.time()
+                if profiling:
+                    t_stage = prof.lap(STAGE_FLUSH, t_stage)
 
                 # --- 6. Indicador de Actividad ---
                 if time.time() - last_stat_time > 1.0:
@@ -162,23 +410,47 @@ class SerialWorker(QObject):
                     self.activity_signal.emit(msgs_per_sec) # Emitir la actividad de esta pestaña
                     midi_msg_count = 0
                     last_stat_time = time.time()
+                    self.nodes.roll_rates(last_stat_time)
 
-                # --- 7. Reconexión Automática ---
-                if time.time() - last_byte_time > self.config['max_silence_s']:
-                    self.log_signal.emit(f"Silencio detectado ({self.config['max_silence_s']}s). Reconectando...", "orange")
-                    self.ser.close()
+                    # Resumen de SysEx descartados (como mucho una línea por segundo)
+                    if sysex.dropped != last_sysex_dropped:
+                        self.log_signal.emit(
+                            f"SysEx descartados: {sysex.dropped_oversize} por tamaño, "
+                            f"{sysex.dropped_unterminated} sin terminar.",
+                            "orange"
+                        )
+                        last_sysex_dropped = sysex.dropped
+                if profiling:
+                    t_stage = prof.lap(STAGE_ACTIVITY, t_stage)
+
+                # --- 7. Reconexión Automática / Conmutación ---
+                silence_s = time.time() - last_byte_time
+                if liveness_armed and silence_s > self.liveness_timeout_s > 0:
+                    # Latido perdido: respuesta sub-segundo
+                    self.declare_port_dead(silence_s, "sin latido")
+                    last_byte_time = time.time()
+                elif silence_s > self.config['max_silence_s']:
+                    self.declare_port_dead(silence_s, f"silencio > {self.config['max_silence_s']}s")
                     last_byte_time = time.time()
+                if profiling:
+                    prof.lap(STAGE_SILENCE, t_stage)
 
             except serial.SerialException as e:
                 self.log_signal.emit(
-                    f"¡Error Crítico! Puerto {self.config['com_port']} desconectado. {e}",
+                    f"¡Error Crítico! Puerto {self.active_port} desconectado. {e}",
                     "red"
                 )
                 self.status_signal.emit("Error de Puerto", "red")
                 if self.ser:
                     self.ser.close()
                 self.ser = None
-                time.sleep(1)
+                if self.standby_port:
+                    # Con respaldo no esperamos: se conmuta en la siguiente vuelta
+                    dead_port = self.active_port
+                    self.switch_port()
+                    self.start_failover(dead_port)
+                else:
+                    time.sleep(1)
             
             except Exception as e:
                 # Aquí deberían llegar SOLO errores realmente inesperados,
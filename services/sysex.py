@@ -0,0 +1,107 @@
+# Ubicación: services/sysex.py
+
+import re
+import mido
+
+# Cualquier byte de STATUS (los de tiempo real ya se extraen antes del parser)
+STATUS_BYTE_RE = re.compile(rb"[\x80-\xff]")
+
+SYSEX_START = 0xF0
+SYSEX_END = 0xF7
+
+# Cabecera de cada bloque en modo por bloques: ID "no comercial" + bandera
+CHUNK_ID = 0x7D
+CHUNK_MORE = 0x01   # siguen más bloques
+CHUNK_LAST = 0x00   # último bloque del mensaje
+
+
+class SysExAssembler:
+    """
+    Reensamblado de SysEx con memoria acotada.
+
+    Los bytes de datos se copian en un bytearray preasignado de max_bytes
+    (nunca crece) y no se reenvía nada hasta ver 0xF7, así un descarte no
+    deja datos a medias en el receptor:
+    - chunk_bytes = 0: se reenvía el mensaje completo.
+    - chunk_bytes > 0: se reenvía un SysEx por cada bloque de chunk_bytes
+      datos, con la forma F0 7D <bandera> <datos> F7; la bandera es 01 si
+      siguen más bloques y 00 en el último (que puede ir vacío).
+
+    Un mensaje que supera max_bytes de datos, que se interrumpe con otro
+    STATUS o que pasa timeout_s sin recibir datos se descarta y solo
+    incrementa un contador.
+    """
+
+    def __init__(self, max_bytes=4096, chunk_bytes=0, timeout_s=1.0):
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes if 0 < chunk_bytes < max_bytes else 0
+        self.timeout_s = timeout_s
+        self.buf = bytearray(max_bytes)
+
+        self.active = False
+        self.overflow = False
+        self.length = 0      # bytes de datos del mensaje en curso
+        self.last_data = 0.0
+
+        self.completed = 0
+        self.dropped_oversize = 0
+        self.dropped_unterminated = 0
+
+    def start(self, now):
+        """Llamado al ver 0xF0."""
+        self.active = True
+        self.overflow = False
+        self.length = 0
+        self.last_data = now
+
+    def feed(self, src, start, end, now):
+        """Copia src[start:end] (solo bytes de datos) al buffer."""
+        self.last_data = now
+        if self.overflow:
+            return
+        n = end - start
+        if self.length + n > self.max_bytes:
+            self.overflow = True
+            self.dropped_oversize += 1
+            return
+        with memoryview(src) as view, view[start:end] as part:
+            self.buf[self.length:self.length + n] = part
+        self.length += n
+
+    def finish(self):
+        """Llamado al ver 0xF7. Devuelve los mensajes a reenviar (vacío si se descartó)."""
+        self.active = False
+        if self.overflow:
+            return []
+        self.completed += 1
+        if not self.chunk_bytes:
+            return [mido.Message("sysex", data=self.buf[:self.length])]
+
+        out = []
+        step = self.chunk_bytes
+        for start in range(0, self.length, step):
+            flag = CHUNK_MORE if start + step < self.length else CHUNK_LAST
+            out.append(self.block(flag, start, min(start + step, self.length)))
+        if not out:
+            out.append(self.block(CHUNK_LAST, 0, 0))
+        return out
+
+    def block(self, flag, start, end):
+        data = bytearray((CHUNK_ID, flag))
+        data += self.buf[start:end]
+        return mido.Message("sysex", data=data)
+
+    def abort(self):
+        """Mensaje sin terminar (nuevo STATUS, timeout o reconexión)."""
+        if self.active and not self.overflow:
+            self.dropped_unterminated += 1
+        self.active = False
+
+    def check_timeout(self, now):
+        """Descarta el mensaje en curso si lleva timeout_s sin recibir datos."""
+        if self.active and now - self.last_data > self.timeout_s:
+            self.abort()
+
+    @property
+    def dropped(self):
+        return self.dropped_oversize + self.dropped_unterminated
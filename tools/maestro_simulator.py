@@ -0,0 +1,423 @@
+# Ubicación: tools/maestro_simulator.py
+
+"""
+Simulador multi-puerto de Maestros para pruebas de escala y soak.
+
+Crea N pseudo-terminales, alimenta cada una con un perfil de tráfico MIDI
+y responde al protocolo de bajada `C,node,mode,palette` como un nodo real.
+Cada pty se conecta a un `SerialWorker` real que escribe, como en la app,
+a través de un `SharedOutput` (escritor compartido, merge por heap y carril
+de prioridad) cuyo puerto mido es un `FakeMidiPort` que registra lo que
+sale. Se mide el camino completo: serial -> parser -> flush -> escritor ->
+puerto. Con --outputs menor que --ports varias pestañas simuladas
+comparten salida, como varios Maestros sobre un mismo sintetizador.
+
+Alcance: cubre SerialWorker y services/midi_output_pool.py. NO ejecuta
+MainWindow/MaestroTab (la GUI no puede conectarse a ptys porque solo lista
+puertos de serial.tools.list_ports); las fugas de la GUI quedan fuera.
+
+Uso (desde la raíz del repositorio):
+
+    python -m tools.maestro_simulator --ports 8 --profile mixed --rate 1500 --duration 7200
+
+Requiere `pty` (Linux/macOS). En Windows no hay pseudo-terminales: usar
+pares de puertos virtuales (com0com) y conectar las pestañas a mano.
+"""
+
+import os
+import sys
+import csv
+import math
+import json
+import time
+import random
+import select
+import argparse
+import threading
+import tracemalloc
+
+import mido
+from PySide6.QtCore import QCoreApplication, Qt
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.serial_worker import SerialWorker
+from services.midi_output_pool import SharedOutput, OutputClient
+from services.latency_stats import LatencyStats
+
+try:
+    import pty
+except ImportError:  # Windows
+    pty = None
+
+
+PROFILES = ("notes", "cc", "garbage", "dropout", "mixed")
+ACTIVE_SENSING_S = 0.25   # < 300 ms, como exige la especificación MIDI
+LOSS_TIMEOUT_S = 2.0      # un mensaje sin llegar tras este tiempo se da por perdido
+ACK_STATUS = 0xA0         # Eco del nodo: Poly Aftertouch [0xA0|canal del Maestro, modo, paleta]
+
+
+class FakeMidiPort:
+    """
+    Sustituto de un puerto de salida de mido (`name`, `send`, `close`) que
+    va dentro de un SharedOutput real. Reparte cada mensaje al Maestro
+    simulado que lo originó según su canal (únicos por puerto).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.by_channel = {}
+        self.realtime = 0
+        self.closed = False
+
+    def send(self, msg):
+        now = time.perf_counter()
+        status = msg.bytes()[0]
+        # No msg.is_realtime: mido no incluye active_sensing ni reset
+        if status >= 0xF8:
+            self.realtime += 1
+            return
+        maestro = self.by_channel.get(status & 0x0F)
+        if maestro is not None:
+            maestro.on_output(msg, now)
+
+    def close(self):
+        self.closed = True
+
+
+class SimulatedMaestro:
+    """Un Maestro simulado: pty + generador de tráfico + nodos + worker real."""
+
+    def __init__(self, index, args, base_config, output, channel):
+        self.index = index
+        self.args = args
+        self.rng = random.Random(args.seed + index)
+        self.channel = channel
+
+        self.master, self.slave = pty.openpty()
+        self.port_name = os.ttyname(self.slave)
+
+        self.lock = threading.Lock()
+        self.pending = {}        # bytes del mensaje -> perf_counter de envío
+        self.cmd_sent = {}       # (node, mode, palette) -> perf_counter
+        self.seq = 0
+        self.sent = 0
+        self.lost = 0
+        self.garbage_bytes = 0
+        self.cmds_sent = 0
+        self.cmds_acked = 0
+        self.received = 0
+        self.unexpected = 0
+        self.latency = LatencyStats()
+        self.downlink = LatencyStats()
+        self.failovers = 0
+        self.warnings = 0
+        self.running = False
+        self.threads = []
+
+        config = dict(base_config)
+        config["com_port"] = self.port_name
+        config["standby_com_port"] = None
+        self.output = output
+        output.port.by_channel[self.channel] = self
+        self.worker = SerialWorker(config, OutputClient(output))
+        self.worker.log_signal.connect(self.on_log, Qt.DirectConnection)
+        self.worker.failover_signal.connect(self.on_failover, Qt.DirectConnection)
+
+    # --- Señales del worker (hilo del worker) ---
+
+    def on_log(self, message, color):
+        if color in ("orange", "red"):
+            self.warnings += 1
+            if self.args.verbose:
+                print(f"[sim {self.index}] {message}")
+
+    def on_failover(self, metrics):
+        self.failovers += 1
+
+    # --- Salida MIDI (hilo escritor o worker, vía FakeMidiPort) ---
+
+    def on_output(self, msg, now):
+        """Empareja un mensaje que salió del puente con su hora de envío."""
+        with self.lock:
+            sent_at = self.pending.pop(bytes(msg.bytes()), None)
+        if sent_at is None:
+            # Basura que el parser dejó pasar o un mensaje ya dado por perdido
+            self.unexpected += 1
+            return
+        self.received += 1
+        self.latency.add((now - sent_at) * 1000.0)
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        self.running = True
+        for target in (self.worker.run, self.traffic_loop, self.downlink_loop, self.command_loop):
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop_traffic(self):
+        """Detiene generador y nodos; el worker sigue vivo para vaciar su cola."""
+        self.running = False
+
+    def stop(self):
+        self.running = False
+        self.worker.stop()
+        for t in self.threads:
+            t.join(timeout=2.0)
+        os.close(self.master)
+        os.close(self.slave)
+
+    # --- Generación de tráfico (subida) ---
+
+    def next_message(self, status):
+        """Mensaje de 3 bytes con un número de secuencia de 14 bits en los datos."""
+        seq = self.seq
+        self.seq = (seq + 1) & 0x3FFF
+        return bytes((status | self.channel, (seq >> 7) & 0x7F, seq & 0x7F))
+
+    def in_dropout(self, elapsed):
+        if self.args.profile not in ("dropout", "mixed"):
+            return False
+        period = self.args.dropout_every_s
+        return period > 0 and (elapsed % period) > (period - self.args.dropout_s)
+
+    def build_batch(self, n):
+        profile = self.args.profile
+        out = bytearray()
+        now = time.perf_counter()
+        for _ in range(n):
+            if profile == "notes" or (profile == "mixed" and self.seq % 4 == 0):
+                msg = self.next_message(0x90)
+            else:
+                msg = self.next_message(0xB0)
+            with self.lock:
+                self.pending[msg] = now
+            out += msg
+            self.sent += 1
+            if profile in ("garbage", "mixed") and self.rng.random() < self.args.garbage:
+                junk = bytes(self.rng.randrange(0, 0xF0) for _ in range(self.rng.randint(1, 3)))
+                out += junk
+                self.garbage_bytes += len(junk)
+        return out
+
+    def traffic_loop(self):
+        start = time.perf_counter()
+        interval = 1.0 / self.args.rate
+        burst = self.args.burst if self.args.profile == "notes" else 1
+        next_batch = start
+        next_sensing = start
+        while self.running:
+            now = time.perf_counter()
+            if self.in_dropout(now - start):
+                # Sin datos ni latido: el worker debe declarar el puerto muerto
+                next_batch = now
+                time.sleep(0.005)
+                continue
+
+            out = bytearray()
+            while next_batch <= now:
+                out += self.build_batch(burst)
+                next_batch += interval * burst
+            if self.args.heartbeat and now >= next_sensing:
+                out.append(0xFE)
+                next_sensing = now + ACTIVE_SENSING_S
+            if out:
+                try:
+                    os.write(self.master, out)
+                except OSError:
+                    pass
+            time.sleep(0.001)
+
+    # --- Nodos simulados (bajada) ---
+
+    def command_loop(self):
+        if self.args.cmd_interval_s <= 0:
+            return
+        while self.running:
+            time.sleep(self.args.cmd_interval_s)
+            key = (self.rng.randrange(self.args.nodes), self.rng.randrange(8), self.rng.randrange(16))
+            with self.lock:
+                self.cmd_sent[key] = time.perf_counter()
+            self.cmds_sent += 1
+            self.worker.send_command(*key)
+
+    def downlink_loop(self):
+        line_buf = bytearray()
+        while self.running:
+            try:
+                ready, _, _ = select.select([self.master], [], [], 0.1)
+                if not ready:
+                    continue
+                line_buf += os.read(self.master, 4096)
+            except OSError:
+                return
+            while b"\n" in line_buf:
+                line, _, rest = line_buf.partition(b"\n")
+                line_buf = bytearray(rest)
+                self.handle_command(line.decode("ascii", "replace").strip())
+
+    def handle_command(self, line):
+        """Responde como un nodo real: eco [0xA0|canal del Maestro, modo, paleta]."""
+        parts = line.split(",")
+        if len(parts) != 4 or parts[0] != "C":
+            return
+        try:
+            node, mode, palette = (int(p) for p in parts[1:])
+        except ValueError:
+            return
+        now = time.perf_counter()
+        ack = bytes((ACK_STATUS | self.channel, mode & 0x7F, palette & 0x7F))
+        with self.lock:
+            sent_at = self.cmd_sent.pop((node, mode, palette), None)
+            self.pending[ack] = now
+        if sent_at is not None:
+            self.cmds_acked += 1
+            self.downlink.add((now - sent_at) * 1000.0)
+        self.sent += 1
+        try:
+            os.write(self.master, ack)
+        except OSError:
+            pass
+
+    # --- Informe ---
+
+    def expire_pending(self):
+        """Cuenta como perdidos los mensajes que no llegaron a tiempo."""
+        limit = time.perf_counter() - LOSS_TIMEOUT_S
+        with self.lock:
+            expired = [k for k, t in self.pending.items() if t < limit]
+            for k in expired:
+                del self.pending[k]
+        self.lost += len(expired)
+
+
+def load_base_config():
+    """Lee config.json de la raíz (o defaults) para configurar los workers."""
+    try:
+        with open(os.path.join(PROJECT_ROOT, "config.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {
+            "baudrate": 115200,
+            "flush_ms": 10,
+            "max_silence_s": 60.0,
+            "running_status": False,
+            "liveness_timeout_ms": 350,
+            "heartbeat_pattern": "FE",
+        }
+
+
+def report(maestros, outputs, elapsed, previous, csv_writer=None):
+    """Imprime throughput, pérdida y latencia por puerto desde el último informe."""
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"--- t={elapsed:.0f}s  memoria {current / 1e6:.1f} MB (pico {peak / 1e6:.1f} MB)  "
+          f"hilos {threading.active_count()} ---")
+    for m in maestros:
+        m.expire_pending()
+        prev_sent, prev_rx, prev_t = previous.get(m.index, (0, 0, 0.0))
+        dt = max(elapsed - prev_t, 1e-6)
+        tx_rate = (m.sent - prev_sent) / dt
+        rx_rate = (m.received - prev_rx) / dt
+        loss_pct = 100.0 * m.lost / m.sent if m.sent else 0.0
+        print(f"[sim {m.index} {m.port_name} -> {m.output.name}] tx {tx_rate:.0f}/s rx {rx_rate:.0f}/s "
+              f"perdidos {m.lost} ({loss_pct:.2f}%) inesperados {m.unexpected} | "
+              f"lat {m.latency.summary()} | cmds {m.cmds_acked}/{m.cmds_sent} "
+              f"bajada {m.downlink.summary()} | fallos {m.failovers} avisos {m.warnings}")
+        if csv_writer:
+            csv_writer.writerow([
+                f"{elapsed:.1f}", m.index, m.sent, m.received, m.lost, m.unexpected,
+                f"{tx_rate:.1f}", f"{rx_rate:.1f}",
+                f"{m.latency.percentile(50):.2f}", f"{m.latency.percentile(99):.2f}",
+                f"{m.latency.max_ms:.2f}", m.cmds_sent, m.cmds_acked,
+                m.failovers, m.garbage_bytes, current,
+            ])
+        previous[m.index] = (m.sent, m.received, elapsed)
+    for shared in outputs:
+        for line in shared.lane_report():
+            print(f"  {line} (tiempo real recibido: {shared.port.realtime})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador multi-puerto de Maestros Okúa.")
+    parser.add_argument("--ports", type=int, default=2, help="número de Maestros simulados")
+    parser.add_argument("--profile", choices=PROFILES, default="mixed")
+    parser.add_argument("--rate", type=float, default=500.0, help="mensajes/seg por puerto")
+    parser.add_argument("--burst", type=int, default=16, help="notas por ráfaga (perfil notes)")
+    parser.add_argument("--garbage", type=float, default=0.01, help="probabilidad de basura por mensaje")
+    parser.add_argument("--dropout-s", type=float, default=1.0, help="duración de cada corte")
+    parser.add_argument("--dropout-every-s", type=float, default=30.0, help="periodo entre cortes")
+    parser.add_argument("--no-heartbeat", dest="heartbeat", action="store_false",
+                        help="no enviar Active Sensing (0xFE)")
+    parser.add_argument("--outputs", type=int, default=1,
+                        help="salidas MIDI compartidas (mínimo ceil(ports/16): canal único por salida)")
+    parser.add_argument("--nodes", type=int, default=64, help="nodos por Maestro")
+    parser.add_argument("--cmd-interval-s", type=float, default=1.0, help="0 desactiva comandos de bajada")
+    parser.add_argument("--duration", type=float, default=60.0, help="segundos (0 = hasta Ctrl+C)")
+    parser.add_argument("--report-s", type=float, default=10.0)
+    parser.add_argument("--csv", help="ruta de CSV con un registro por informe y puerto")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="mostrar avisos de los workers")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if pty is None:
+        print("Este sistema no tiene pseudo-terminales (pty). Use pares com0com en Windows.")
+        return 1
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    tracemalloc.start()
+
+    base_config = load_base_config()
+    n_outputs = max(args.outputs, math.ceil(args.ports / 16))
+    merge_window_s = base_config.get("merge_window_ms", 0) / 1000.0
+    outputs = [SharedOutput(f"sim-out-{k}", FakeMidiPort(f"sim-out-{k}"), merge_window_s)
+               for k in range(n_outputs)]
+    # Maestro i -> salida i % K, canal i // K: como mucho 16 Maestros por salida,
+    # así el canal identifica al Maestro dentro de cada salida
+    maestros = [SimulatedMaestro(i, args, base_config, outputs[i % n_outputs], i // n_outputs)
+                for i in range(args.ports)]
+    for m in maestros:
+        print(f"Maestro simulado {m.index}: {m.port_name} (canal {m.channel + 1}, {m.output.name})")
+        m.start()
+
+    csv_file = open(args.csv, "w", newline="", encoding="utf-8") if args.csv else None
+    csv_writer = None
+    if csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow([
+            "t_s", "port", "sent", "received", "lost", "unexpected", "tx_rate", "rx_rate",
+            "lat_p50_ms", "lat_p99_ms", "lat_max_ms", "cmds_sent", "cmds_acked",
+            "failovers", "garbage_bytes", "traced_bytes",
+        ])
+
+    start = time.perf_counter()
+    previous = {}
+    try:
+        while args.duration <= 0 or time.perf_counter() - start < args.duration:
+            time.sleep(args.report_s)
+            report(maestros, outputs, time.perf_counter() - start, previous, csv_writer)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for m in maestros:
+            m.stop_traffic()
+        # Dejar que los workers hagan su último flush antes de contar pérdidas
+        time.sleep(LOSS_TIMEOUT_S)
+        for m in maestros:
+            m.stop()
+        print("=== Resumen final ===")
+        report(maestros, outputs, time.perf_counter() - start, previous, csv_writer)
+        for shared in outputs:
+            shared.close()
+        if csv_file:
+            csv_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())